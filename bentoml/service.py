@@ -1,7 +1,11 @@
 import bentoml
+import joblib
 import mlflow
-import pandas as pd
+import mlflow.sklearn
+import numpy as np
 import os
+import threading
+from collections import OrderedDict
 
 # Expected features in training order
 EXPECTED_FEATURES = [
@@ -13,9 +17,22 @@ EXPECTED_FEATURES = [
     'HouseAge', 'RemodAge', 'TotalSF', 'TotalBath', 'PricePerSqFt'
 ]
 
+# Accepted alternate names for the features that start with a digit
+ALIASES = {'FirstFlrSF': '1stFlrSF', 'SecondFlrSF': '2ndFlrSF'}
+
+# Largest batch the dispatcher will hand to predict
+MAX_BATCH = 64
+
+# Number of distinct feature rows whose predictions are memoized
+CACHE_SIZE = 4096
+
+# Workers memory-map the model from here so its arrays are shared, not copied
+MODEL_SHM_DIR = os.getenv("MODEL_SHM_DIR", "/dev/shm")
+
 @bentoml.service(
     name="housing-predictor",
-    resources={"cpu": "1"},
+    resources={"cpu": "4"},
+    workers=4,
 )
 class HousingPredictor:
     
@@ -24,43 +41,144 @@ class HousingPredictor:
         mlflow.set_tracking_uri(mlflow_uri)
         
         print(f"Loading model from MLflow: {mlflow_uri}")
-        self.model = mlflow.pyfunc.load_model("models:/housing model@production")
+        self.model = self._share(mlflow.sklearn.load_model("models:/housing model@production"))
         self.feature_names = EXPECTED_FEATURES
         
+        # Column index per feature, and a per-thread input buffer reused across calls
+        self._feat_idx = {name: i for i, name in enumerate(EXPECTED_FEATURES)}
+        self._local = threading.local()
+        
+        # LRU of feature row -> predicted price, shared by all request threads
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
         print("✓ Model loaded successfully")
+        
+        # Run one throwaway prediction so the first real request doesn't pay
+        # for lazy imports and first-call setup inside sklearn. Errors are
+        # left to propagate: a model that can't predict must not pass /readyz.
+        self.model.predict(np.zeros((1, len(EXPECTED_FEATURES)), dtype=np.float32))
+        print("✓ Model warmed up")
+    
+    @staticmethod
+    def _share(model):
+        """Re-load the model memory-mapped from shared memory, if available"""
+        tmp_path = None
+        try:
+            # Keyed by content so workers holding the same model map the same
+            # file, and a newly promoted model never picks up a stale one
+            path = os.path.join(MODEL_SHM_DIR, f"housing_model_{joblib.hash(model)}.joblib")
+            if not os.path.exists(path):
+                # Write under a per-process name and rename, so workers
+                # starting together never read a half-written file
+                tmp_path = f"{path}.{os.getpid()}"
+                joblib.dump(model, tmp_path)
+                os.replace(tmp_path, path)
+                tmp_path = None
+            return joblib.load(path, mmap_mode="r")
+        except OSError as e:
+            print(f"Shared-memory model unavailable, keeping private copy: {e}")
+            # Don't leave a partial dump (e.g. after ENOSPC) filling /dev/shm
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return model
+    
+    def _buffer(self, n: int) -> np.ndarray:
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[0] < n:
+            buf = np.empty((max(n, MAX_BATCH), len(EXPECTED_FEATURES)), dtype=np.float32)
+            self._local.buf = buf
+        return buf
+    
+    def _cache_get(self, key: tuple):
+        with self._cache_lock:
+            price = self._cache.get(key)
+            if price is not None:
+                self._cache.move_to_end(key)
+            return price
+    
+    def _cache_put(self, key: tuple, price: float):
+        with self._cache_lock:
+            self._cache[key] = price
+            self._cache.move_to_end(key)
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+    
+    @staticmethod
+    def _success(price: float) -> dict:
+        return {
+            "predicted_price": price,
+            "predicted_price_formatted": f"${price:,.2f}",
+            "status": "success"
+        }
     
     @bentoml.api
-    def predict(self, input_data: dict) -> dict:
+    async def predict(self, input_data: dict) -> dict:
         """Predict house price"""
-        try:
-            data = input_data.copy()
-            
+        # Go through the async handle so the record joins the batch dispatcher;
+        # a blocking call to predict_batch from a sync API stalls until timeout
+        results = await self.to_async.predict_batch([input_data])
+        return results[0]
+    
+    @bentoml.api(batchable=True, batch_dim=0, max_batch_size=MAX_BATCH, max_latency_ms=20)
+    def predict_batch(self, input_data: list[dict]) -> list[dict]:
+        """Predict house prices for a batch of requests"""
+        results = [None] * len(input_data)
+        buf = self._buffer(len(input_data))
+        positions = []
+        keys = []
+        
+        for i, record in enumerate(input_data):
             # Handle field naming
-            if 'FirstFlrSF' in data:
-                data['1stFlrSF'] = data.pop('FirstFlrSF')
-            if 'SecondFlrSF' in data:
-                data['2ndFlrSF'] = data.pop('SecondFlrSF')
-            
-            df = pd.DataFrame([data])
+            data = {ALIASES.get(k, k): v for k, v in record.items()}
             
             # Check missing
-            missing = set(self.feature_names) - set(df.columns)
+            missing = [f for f in self.feature_names if data.get(f) is None]
             if missing:
-                return {"status": "error", "message": f"Missing: {list(missing)}"}
-            
-            # Reorder
-            df = df[self.feature_names]
+                results[i] = {"status": "error", "message": f"Missing: {list(missing)}"}
+                continue
             
-            # Predict
-            prediction = self.model.predict(df)
+            # Scatter values straight into the next free buffer row
+            row = len(positions)
+            try:
+                for k, v in data.items():
+                    col = self._feat_idx.get(k)
+                    if col is not None:
+                        buf[row, col] = v
+            except (TypeError, ValueError) as e:
+                results[i] = {"status": "error", "message": str(e)}
+                continue
             
-            return {
-                "predicted_price": float(prediction[0]),
-                "predicted_price_formatted": f"${prediction[0]:,.2f}",
-                "status": "success"
-            }
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
+            # Serve repeats from the cache; only misses go to the model.
+            # Rows containing NaN are never cached.
+            key = None
+            if not np.isnan(buf[row]).any():
+                key = tuple(buf[row].tolist())
+                price = self._cache_get(key)
+                if price is not None:
+                    results[i] = self._success(price)
+                    continue
+            positions.append(i)
+            keys.append(key)
+        
+        if positions:
+            try:
+                # One model call for the whole batch, straight on the buffer
+                predictions = self.model.predict(buf[:len(positions)])
+                
+                for i, key, price in zip(positions, keys, predictions):
+                    price = float(price)
+                    if key is not None:
+                        self._cache_put(key, price)
+                    results[i] = self._success(price)
+            except Exception as e:
+                for i in positions:
+                    results[i] = {"status": "error", "message": str(e)}
+        
+        return results
     
     @bentoml.api
     def health(self) -> dict:
@@ -1,6 +1,14 @@
 from airflow import DAG
 from airflow.operators.bash import BashOperator
+from airflow.operators.python import PythonOperator
 from datetime import datetime, timedelta
+import os
+import sys
+
+# Project checkout mounted into the Airflow pods
+MLOPS_HOME = '/opt/mlops'
+if MLOPS_HOME not in sys.path:
+    sys.path.insert(0, MLOPS_HOME)
 
 default_args = {
     'owner': 'manas',
@@ -21,17 +29,30 @@ dag = DAG(
     tags=['mlops', 'house-price', 'training'],
 )
 
-etl_task = BashOperator(
+# The pipeline scripts run in-process instead of in a fresh python3 subprocess.
+# They are imported inside the callables so DAG parsing doesn't pay for
+# pandas/sklearn/mlflow, and chdir because they use project-relative paths.
+def run_etl():
+    from scripts.etl_pipeline import run_etl as etl_main
+    os.chdir(MLOPS_HOME)
+    return etl_main()
+
+def train_model():
+    from scripts.train_new_experiment import main as train_main
+    os.chdir(MLOPS_HOME)
+    train_main()
+
+etl_task = PythonOperator(
     task_id='run_etl',
-    bash_command='cd /opt/mlops && python3 scripts/etl_pipeline.py',
+    python_callable=run_etl,
     dag=dag,
 )
 
 validate_data_task = BashOperator(
     task_id='validate_data',
     bash_command='''
-    if [ ! -f /opt/mlops/data/processed/train.csv ]; then
-        echo "Error: train.csv not found"
+    if [ ! -f /opt/mlops/data/processed/train.parquet ]; then
+        echo "Error: train.parquet not found"
         exit 1
     fi
     echo "✓ Data validation passed"
@@ -39,9 +60,9 @@ validate_data_task = BashOperator(
     dag=dag,
 )
 
-train_task = BashOperator(
+train_task = PythonOperator(
     task_id='train_model',
-    bash_command='cd /opt/mlops && python3 scripts/train_new_experiment.py',
+    python_callable=train_model,
     dag=dag,
 )
 
@@ -1,10 +1,23 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 
+# Select important features (you can expand this list)
+SELECTED_FEATURES = [
+    'LotArea', 'OverallQual', 'OverallCond', 'YearBuilt', 'YearRemodAdd',
+    'TotalBsmtSF', '1stFlrSF', '2ndFlrSF', 'GrLivArea', 
+    'FullBath', 'HalfBath', 'BedroomAbvGr', 'TotRmsAbvGrd',
+    'Fireplaces', 'GarageCars', 'GarageArea', 'WoodDeckSF',
+    'OpenPorchSF', 'PoolArea', 'YrSold', 'MoSold'
+]
+
+# Parse straight into float32: the pipeline computes in float32 and
+# float columns can still hold NaN for the median fill below
+RAW_DTYPES = {col: 'float32' for col in SELECTED_FEATURES + ['SalePrice']}
+
 def run_etl():
     print("=" * 60)
     print("House Price Prediction - ETL Pipeline")
@@ -12,7 +25,12 @@ def run_etl():
     
     # 1. Load raw data
     print("\n[1/6] Loading raw data...")
-    df = pd.read_csv('data/raw/train.csv')
+    df = pd.read_csv(
+        'data/raw/train.csv',
+        usecols=SELECTED_FEATURES + ['SalePrice'],
+        dtype=RAW_DTYPES,
+        engine='c',
+    )
     print(f"   Loaded {len(df)} records with {df.shape[1]} columns")
     print(f"   Target variable: SalePrice")
     
@@ -26,44 +44,51 @@ def run_etl():
     # 3. Feature Selection - Keep only numeric + important categorical
     print("\n[3/6] Feature selection...")
     
-    # Select important features (you can expand this list)
-    selected_features = [
-        'LotArea', 'OverallQual', 'OverallCond', 'YearBuilt', 'YearRemodAdd',
-        'TotalBsmtSF', '1stFlrSF', '2ndFlrSF', 'GrLivArea', 
-        'FullBath', 'HalfBath', 'BedroomAbvGr', 'TotRmsAbvGrd',
-        'Fireplaces', 'GarageCars', 'GarageArea', 'WoodDeckSF',
-        'OpenPorchSF', 'PoolArea', 'YrSold', 'MoSold'
-    ]
-    
     # Add target
-    df_selected = df[selected_features + ['SalePrice']].copy()
-    print(f"   Selected {len(selected_features)} features")
+    df_selected = df[SELECTED_FEATURES + ['SalePrice']]
+    print(f"   Selected {len(SELECTED_FEATURES)} features")
     
     # 4. Handle Missing Values
     print("\n[4/6] Handling missing values...")
     # Fill numeric missing values with median
-    for col in df_selected.columns:
-        if df_selected[col].isnull().sum() > 0:
-            df_selected[col].fillna(df_selected[col].median(), inplace=True)
-    print(f"   Missing values after handling: {df_selected.isnull().sum().sum()}")
+    medians = df_selected.median(numeric_only=True)
+    df_selected = df_selected.fillna(medians)
+    print(f"   Missing values after handling: {df_selected.isna().to_numpy().sum()}")
     
     # 5. Feature Engineering
     print("\n[5/6] Feature engineering...")
-    df_selected['HouseAge'] = df_selected['YrSold'] - df_selected['YearBuilt']
-    df_selected['RemodAge'] = df_selected['YrSold'] - df_selected['YearRemodAdd']
-    df_selected['TotalSF'] = df_selected['TotalBsmtSF'] + df_selected['1stFlrSF'] + df_selected['2ndFlrSF']
-    df_selected['TotalBath'] = df_selected['FullBath'] + 0.5 * df_selected['HalfBath']
-    df_selected['PricePerSqFt'] = df_selected['SalePrice'] / df_selected['GrLivArea']
+    # Columns are already float32 (RAW_DTYPES); add all engineered columns in one assign
+    df_selected = df_selected.assign(
+        HouseAge=lambda d: d['YrSold'] - d['YearBuilt'],
+        RemodAge=lambda d: d['YrSold'] - d['YearRemodAdd'],
+        TotalSF=lambda d: d['TotalBsmtSF'] + d['1stFlrSF'] + d['2ndFlrSF'],
+        TotalBath=lambda d: d['FullBath'] + 0.5 * d['HalfBath'],
+        PricePerSqFt=lambda d: d['SalePrice'] / d['GrLivArea'],
+    )
     
     print(f"   Created 5 new features")
     print(f"   Total features: {len(df_selected.columns) - 1}")  # Exclude target
     
+    # Store low-cardinality counts/ordinals as category; done after the
+    # arithmetic above since category columns don't support it
+    categorical_features = [
+        'OverallQual', 'OverallCond', 'MoSold', 'GarageCars', 'Fireplaces',
+        'YrSold', 'FullBath', 'HalfBath', 'BedroomAbvGr', 'TotRmsAbvGrd'
+    ]
+    for col in categorical_features:
+        df_selected[col] = pd.Categorical(df_selected[col])
+    print(f"   Stored {len(categorical_features)} features as category")
+    
     # 6. Train/Validation/Test Split
     print("\n[6/6] Splitting data...")
-    # First split: 80% train+val, 20% test
-    train_val_df, test_df = train_test_split(df_selected, test_size=0.2, random_state=42)
-    # Second split: 75% train, 25% val (of the 80%)
-    train_df, val_df = train_test_split(train_val_df, test_size=0.25, random_state=42)
+    # One shuffle, sliced into 20% test, 20% val (25% of the remaining 80%), 60% train
+    n = len(df_selected)
+    idx = np.random.default_rng(42).permutation(n)
+    n_test = int(0.2 * n)
+    n_val = int(0.8 * 0.25 * n)
+    test_df = df_selected.iloc[idx[:n_test]]
+    val_df = df_selected.iloc[idx[n_test:n_test + n_val]]
+    train_df = df_selected.iloc[idx[n_test + n_val:]]
     
     print(f"   Training set: {len(train_df)} records ({len(train_df)/len(df_selected)*100:.1f}%)")
     print(f"   Validation set: {len(val_df)} records ({len(val_df)/len(df_selected)*100:.1f}%)")
@@ -73,9 +98,21 @@ def run_etl():
     print("\nSaving processed data...")
     os.makedirs('data/processed', exist_ok=True)
     
-    train_df.to_csv('data/processed/train.csv', index=False)
-    val_df.to_csv('data/processed/val.csv', index=False)
-    test_df.to_csv('data/processed/test.csv', index=False)
+    # The three files are independent, so encode and write them concurrently.
+    # Concurrent Table.from_pandas calls are not thread-safe on older pyarrow
+    # (sporadic KeyError on 14.x); the Airflow image pins pyarrow 17.
+    splits = [
+        (train_df, 'data/processed/train.parquet'),
+        (val_df, 'data/processed/val.parquet'),
+        (test_df, 'data/processed/test.parquet'),
+    ]
+    with ThreadPoolExecutor(max_workers=len(splits)) as executor:
+        futures = [
+            executor.submit(split_df.to_parquet, path, engine='pyarrow', compression='snappy', index=False)
+            for split_df, path in splits
+        ]
+        for future in futures:
+            future.result()
     
     # Save metadata
     metadata = {
@@ -101,9 +138,9 @@ def run_etl():
     print("ETL Pipeline Completed Successfully!")
     print("=" * 60)
     print(f"\nOutput files:")
-    print(f"  - data/processed/train.csv ({len(train_df)} rows)")
-    print(f"  - data/processed/val.csv ({len(val_df)} rows)")
-    print(f"  - data/processed/test.csv ({len(test_df)} rows)")
+    print(f"  - data/processed/train.parquet ({len(train_df)} rows)")
+    print(f"  - data/processed/val.parquet ({len(val_df)} rows)")
+    print(f"  - data/processed/test.parquet ({len(test_df)} rows)")
     print(f"  - data/processed/metadata.json")
     print(f"\nPrice Range: ${metadata['price_stats']['min']:,.0f} - ${metadata['price_stats']['max']:,.0f}")
     print(f"Average Price: ${metadata['price_stats']['mean']:,.0f}")
@@ -1,34 +1,67 @@
 import os
 os.environ["MLFLOW_TRACKING_URI"] = "http://localhost:30000"
+# Queue params/metrics/tags and send them from a background thread; each
+# run is flushed when it ends
+os.environ["MLFLOW_ENABLE_ASYNC_LOGGING"] = "true"
 
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
 from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import mlflow
 import mlflow.sklearn
+from mlflow.models import ModelSignature
+from mlflow.types import ColSpec, Schema
+
+def model_signature(feature_columns, X_arr):
+    # Declared input types for the logged models, so pyfunc consumers validate
+    # against fixed columns instead of inferring per request. pyfunc won't cast
+    # int64 to double, and JSON integers arrive as int64, so whole-number
+    # features (counts, years, areas) are 'long' and only fractional ones
+    # (TotalBath, PricePerSqFt) are 'double'. No output schema:
+    # LinearRegression returns float32, the boosted model float64.
+    integral = np.all(X_arr == np.round(X_arr), axis=0)
+    return ModelSignature(
+        inputs=Schema([
+            ColSpec('long' if is_int else 'double', name)
+            for name, is_int in zip(feature_columns, integral)
+        ]),
+    )
+
+def to_arrays(df, feature_columns):
+    # sklearn needs plain numbers; astype turns category columns back into
+    # their values (not .cat.codes) so serving can keep sending raw features
+    X = df[feature_columns].astype(np.float32).to_numpy(copy=False)
+    y = df['SalePrice'].to_numpy(dtype=np.float32, copy=False)
+    return X, y
 
 def load_data():
-    train_df = pd.read_csv('data/processed/train.csv')
-    val_df = pd.read_csv('data/processed/val.csv')
-    test_df = pd.read_csv('data/processed/test.csv')
-    
-    X_train = train_df.drop('SalePrice', axis=1)
-    y_train = train_df['SalePrice']
-    X_val = val_df.drop('SalePrice', axis=1)
-    y_val = val_df['SalePrice']
-    X_test = test_df.drop('SalePrice', axis=1)
-    y_test = test_df['SalePrice']
-    
-    return X_train, y_train, X_val, y_val, X_test, y_test
+    train_df = pd.read_parquet('data/processed/train.parquet')
+    val_df = pd.read_parquet('data/processed/val.parquet')
+    test_df = pd.read_parquet('data/processed/test.parquet')
+    
+    # Features are whatever the ETL wrote, in its column order; the models are
+    # fit on bare arrays, so this list is what labels their inputs
+    feature_columns = [col for col in train_df.columns if col != 'SalePrice']
+    
+    X_train, y_train = to_arrays(train_df, feature_columns)
+    X_val, y_val = to_arrays(val_df, feature_columns)
+    X_test, y_test = to_arrays(test_df, feature_columns)
+    
+    return feature_columns, X_train, y_train, X_val, y_val, X_test, y_test
 
-def evaluate_model(model, X, y, dataset_name="Dataset"):
-    y_pred = model.predict(X)
-    rmse = np.sqrt(mean_squared_error(y, y_pred))
-    mae = mean_absolute_error(y, y_pred)
-    r2 = r2_score(y, y_pred)
-    mape = np.mean(np.abs((y - y_pred) / y)) * 100
+def evaluate_model(model, X_arr, y_arr, dataset_name="Dataset"):
+    y_pred = model.predict(X_arr)
+    
+    # All metrics from one residual array (float64 so the sums stay exact)
+    y = y_arr.astype(np.float64)
+    r = np.subtract(y, y_pred)
+    sq = r * r
+    rmse = np.sqrt(sq.mean())
+    mae = np.abs(r).mean()
+    r2 = 1 - sq.sum() / np.square(y - y.mean()).sum()
+    mape = np.mean(np.abs(r / y)) * 100
     
     print(f"{dataset_name} - RMSE: ${rmse:,.2f}, MAE: ${mae:,.2f}, R²: {r2:.4f}, MAPE: {mape:.2f}%")
     
@@ -57,7 +90,8 @@ def main():
     print(f"MLflow Version: {mlflow.__version__}")
     print(f"Tracking URI: {mlflow.get_tracking_uri()}")
     
-    X_train, y_train, X_val, y_val, X_test, y_test = load_data()
+    feature_columns, X_train, y_train, X_val, y_val, X_test, y_test = load_data()
+    signature = model_signature(feature_columns, X_train)
     print(f"\nData: Train={X_train.shape}, Val={X_val.shape}, Test={X_test.shape}")
     
     # Train Baseline
@@ -86,7 +120,7 @@ def main():
         mlflow.log_metrics({**train_metrics, **val_metrics})
         
         print("\nLogging model artifact via HTTP...")
-        mlflow.sklearn.log_model(model, "model")
+        mlflow.sklearn.log_model(model, "model", signature=signature)
         print("✓ Baseline model logged successfully!")
         baseline_run_id = mlflow.active_run().info.run_id
     
@@ -96,10 +130,9 @@ def main():
     print("="*60)
     
     params = {
-        'n_estimators': 100,
+        'max_iter': 100,
         'learning_rate': 0.1,
         'max_depth': 5,
-        'min_samples_split': 5,
         'min_samples_leaf': 2,
         'random_state': 42
     }
@@ -108,10 +141,10 @@ def main():
         artifact_uri = mlflow.get_artifact_uri()
         print(f"\n🔍 Artifact URI: {artifact_uri}")
         
-        model = GradientBoostingRegressor(**params)
+        model = HistGradientBoostingRegressor(**params)
         model.fit(X_train, y_train)
         
-        mlflow.log_param("model_type", "GradientBoostingRegressor")
+        mlflow.log_param("model_type", "HistGradientBoostingRegressor")
         mlflow.log_params(params)
         
         train_metrics = evaluate_model(model, X_train, y_train, "train")
@@ -119,17 +152,25 @@ def main():
         test_metrics = evaluate_model(model, X_test, y_test, "test")
         mlflow.log_metrics({**train_metrics, **val_metrics, **test_metrics})
         
-        # Feature importance
-        feature_importance = pd.DataFrame({
-            'feature': X_train.columns,
-            'importance': model.feature_importances_
-        }).sort_values('importance', ascending=False)
+        # Feature importance (HistGradientBoosting has no feature_importances_)
+        perm = permutation_importance(model, X_val, y_val, n_repeats=5, random_state=42)
+        imp = perm.importances_mean
+        mlflow.log_dict(
+            {name: float(value) for name, value in zip(feature_columns, imp)},
+            "feature_importance.json"
+        )
+        
+        # Top 10 via partial selection; only those 10 get sorted
+        k = min(10, len(imp))
+        top = np.argpartition(imp, -k)[-k:]
+        top = top[np.argsort(imp[top])[::-1]]
         
         print("\nTop 10 Features:")
-        print(feature_importance.head(10).to_string(index=False))
+        for i in top:
+            print(f"{feature_columns[i]:>15} {imp[i]:.6f}")
         
         print("\nLogging model artifact via HTTP...")
-        mlflow.sklearn.log_model(model, "model")
+        mlflow.sklearn.log_model(model, "model", signature=signature)
         print("✓ Advanced model logged successfully!")
         advanced_run_id = mlflow.active_run().info.run_id
     